@@ -12,6 +12,9 @@ from db import (
     get_player,
     reset_tournament,
     get_match,
+    list_tournaments,
+    create_tournament,
+    set_current_tournament,
 )
 
 from bracket import (
@@ -22,6 +25,27 @@ from bracket import (
 
 st.set_page_config(page_title="Ping Pong Tournament", layout="wide")
 
+# --- torneo corrente ---
+# ogni torneo ha il suo file SQLite: scegliere il torneo instrada tutte le query
+# la scelta sta in una chiave non-widget: quando un altro admin crea un torneo
+# le opzioni cambiano, il widget viene ricreato e senza index= tornerebbe al primo
+tournament_names = dict(list_tournaments())
+tournament_ids = list(tournament_names)
+if st.session_state.get("tournament_id") not in tournament_names:
+    st.session_state.tournament_id = tournament_ids[0]
+
+with st.sidebar:
+    st.markdown("### 🏆 Torneo")
+    tournament_id = st.selectbox(
+        "Torneo",
+        tournament_ids,
+        index=tournament_ids.index(st.session_state.tournament_id),
+        format_func=tournament_names.get,
+    )
+
+st.session_state.tournament_id = tournament_id
+set_current_tournament(tournament_id)
+
 # --- init ---
 init_db()
 
@@ -124,6 +148,7 @@ st.markdown("---")
 
 # --- UI ---
 st.title("🏓 Torneo Ping Pong")
+st.caption(tournament_names[tournament_id])
 
 tab_dashboard, tab_admin = st.tabs(["📊 Dashboard", "⚙️ Admin"])
 
@@ -172,6 +197,18 @@ with tab_admin:
     if not is_admin():
         st.warning("Accedi come admin dalla sidebar per gestire il torneo.")
     else:
+        st.subheader("Nuovo torneo")
+        st.caption("Ogni torneo (es. femminile, under 18, doppio) ha tabellone e partecipanti separati.")
+        new_name = st.text_input("Nome torneo", placeholder="Under 18")
+        if st.button("🏆 Crea torneo"):
+            try:
+                st.session_state.tournament_id = create_tournament(new_name)
+                st.rerun()
+            except ValueError as e:
+                st.error(str(e))
+
+        st.divider()
+
         st.subheader("Gestione partecipanti")
 
         c1, c2 = st.columns(2, gap="large")
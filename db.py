@@ -1,15 +1,190 @@
+import re
 import sqlite3
+import threading
+import unicodedata
+from contextvars import ContextVar
 from pathlib import Path
 
+# torneo di default: resta su tournament.db per compatibilità con i dati esistenti
 DB_PATH = Path("tournament.db")
+TOURNAMENTS_DIR = Path("tournaments")
+REGISTRY_PATH = TOURNAMENTS_DIR / "_registry.db"  # "_" non compare mai negli id
 
-def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+DEFAULT_TOURNAMENT = "default"
 
-def init_db():
-    conn = get_conn()
+_current_tournament = ContextVar("current_tournament", default=DEFAULT_TOURNAMENT)
+
+# pool di connessioni a livello di processo, per file: Streamlit esegue ogni
+# rerun in un thread nuovo, quindi una cache per-thread durerebbe un solo rerun
+POOL_SIZE = 8
+_pool = {}
+_pool_lock = threading.Lock()
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connessione SQLite reale tenuta nel pool; i chiamanti ricevono un ConnectionLease."""
+    setup_done = False
+
+
+class ConnectionLease:
+    """
+    Quello che ritorna get_conn(): delega tutto alla connessione del pool e
+    close() scarta la transazione aperta (come farebbe una close vera) e la
+    rimette nel pool. Ogni get_conn() crea un lease nuovo, quindi una close()
+    ripetuta su un riferimento vecchio non tocca chi ha ripreso la stessa
+    connessione nel frattempo. Se una funzione esce con un'eccezione senza
+    chiudere, la connessione non torna nel pool e viene chiusa dal GC.
+    """
+    def __init__(self, conn, key):
+        self._conn = conn
+        self._key = key
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(conn, name)
+
+    def close(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is None:
+            return  # close() ripetuta: no-op
+        conn.rollback()
+        _release(self._key, conn)
+
+
+def _acquire(path: Path, setup=None):
+    key = str(path)
+    with _pool_lock:
+        idle = _pool.setdefault(key, [])
+        conn = idle.pop() if idle else None
+    if conn is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, factory=PooledConnection)
+        conn.execute("PRAGMA foreign_keys = ON;")
+    elif conn.in_transaction:
+        # non dovrebbe succedere (close() fa rollback), ma una scrittura a
+        # metà non deve mai finire nel commit() di qualcun altro
+        conn.rollback()
+    if setup is not None and not conn.setup_done:
+        setup(conn)
+        conn.setup_done = True
+    return ConnectionLease(conn, key)
+
+def _release(key, conn):
+    with _pool_lock:
+        idle = _pool.setdefault(key, [])
+        if len(idle) < POOL_SIZE:
+            idle.append(conn)
+            return
+    conn.close()
+
+def close_conns():
+    """Chiude tutte le connessioni inattive nel pool."""
+    with _pool_lock:
+        idle = [c for conns in _pool.values() for c in conns]
+        _pool.clear()
+    for conn in idle:
+        conn.close()
+
+# --- registry / routing ---
+def tournament_path(tournament_id: str) -> Path:
+    if tournament_id == DEFAULT_TOURNAMENT:
+        return DB_PATH
+    if not re.fullmatch(r"[a-z0-9-]+", tournament_id or ""):
+        raise ValueError(f"Id torneo non valido: {tournament_id!r}")
+    return TOURNAMENTS_DIR / f"{tournament_id}.db"
+
+def current_tournament() -> str:
+    return _current_tournament.get()
+
+def set_current_tournament(tournament_id: str):
+    """
+    Instrada tutte le funzioni di questo modulo (e di bracket.py) sul torneo
+    indicato, per il contesto corrente (thread dello script Streamlit).
+    """
+    tournament_path(tournament_id)  # valida l'id
+    _current_tournament.set(tournament_id)
+
+def _registry_conn():
+    # tabella creata su ogni nuova connessione: segue REGISTRY_PATH anche se cambia
+    return _acquire(REGISTRY_PATH, setup=_init_registry)
+
+def _init_registry(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS tournaments (
+        id TEXT PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+    conn.execute(
+        "INSERT OR IGNORE INTO tournaments(id, name) VALUES (?, ?);",
+        (DEFAULT_TOURNAMENT, "Torneo principale"),
+    )
+    conn.commit()
+
+def list_tournaments():
+    conn = _registry_conn()
+    rows = conn.execute(
+        "SELECT id, name FROM tournaments ORDER BY id = ? DESC, created_at, name;",
+        (DEFAULT_TOURNAMENT,),
+    ).fetchall()
+    conn.close()
+    return rows
+
+def _slugify(name: str) -> str:
+    # "Élite" -> "elite"; nomi senza lettere latine (es. "女子") danno ""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-")
+
+def _register_tournament(name: str) -> str:
+    conn = _registry_conn()
+    try:
+        # IMMEDIATE: nessun altro processo può prendere lo stesso id nel frattempo
+        conn.execute("BEGIN IMMEDIATE;")
+        if conn.execute("SELECT 1 FROM tournaments WHERE name=?;", (name,)).fetchone():
+            raise ValueError("Esiste già un torneo con questo nome.")
+
+        # l'id è solo il nome del file: se è vuoto o già preso aggiungi un suffisso
+        base = _slugify(name) or "torneo"
+        taken = {r[0] for r in conn.execute(
+            "SELECT id FROM tournaments WHERE id = ? OR id LIKE ?;", (base, base + "-%")
+        )}
+        tournament_id, n = base, 1
+        while tournament_id in taken or tournament_id == DEFAULT_TOURNAMENT:
+            n += 1
+            tournament_id = f"{base}-{n}"
+
+        conn.execute("INSERT INTO tournaments(id, name) VALUES (?, ?);", (tournament_id, name))
+        conn.commit()
+    finally:
+        conn.close()
+    return tournament_id
+
+def create_tournament(name: str) -> str:
+    name = (name or "").strip()
+    if not name:
+        raise ValueError("Inserisci un nome per il torneo.")
+
+    try:
+        tournament_id = _register_tournament(name)
+    except sqlite3.OperationalError as e:
+        if "locked" not in str(e) and "busy" not in str(e):
+            raise
+        # registry bloccato da un'altra scrittura oltre il timeout di sqlite3
+        raise ValueError("Registro tornei occupato: riprova tra qualche secondo.")
+
+    init_db(tournament_id)
+    return tournament_id
+
+def get_conn(tournament_id: str | None = None):
+    return _acquire(tournament_path(tournament_id or current_tournament()))
+
+def init_db(tournament_id: str | None = None):
+    conn = get_conn(tournament_id)
     cur = conn.cursor()
 
     cur.execute("""
@@ -0,0 +1,342 @@
+"""
+Load test offline dell'app: simula N sessioni concorrenti (spettatori + admin)
+che fanno rerun di app.py tramite streamlit.testing.v1.AppTest, mentre gli
+admin salvano risultati dal tab Admin.
+
+Ogni sessione gira in un processo separato (AppTest non è pensato per essere
+condiviso tra thread) contro database temporanei, quindi tournament.db e
+tournaments/ reali non vengono toccati. Con --tournaments > 1 le sessioni
+vengono distribuite a turno su più tornei (un file SQLite ciascuno).
+
+Esempio:
+    python loadtest.py --sessions 20 --admins 2 --tournaments 2 --duration 30
+
+Metriche riportate:
+- latenza dei rerun (p50/p95/p99) per spettatori e admin
+- throughput (rerun/s e risultati salvati/s)
+- attese sui lock SQLite: sqlite3 non espone il busy handler, quindi le
+  connessioni vengono aperte con timeout=0 e i retry su "database is locked"
+  li fa _timed(), con gli stessi intervalli del busy handler di SQLite e lo
+  stesso budget di 5 s dell'app. Il tempo passato nei retry è l'attesa sul
+  lock; gli statement che finiscono il budget contano come errori.
+- statement lenti: esecuzione (al netto dell'attesa sul lock) oltre
+  --lock-threshold-ms, come indicatore secondario
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import db
+
+APP_DIR = Path(__file__).resolve().parent
+
+
+# --- strumentazione SQLite ---
+LOCK_TIMEOUT_S = 5.0  # default di sqlite3.connect, quello che usa db.py
+# intervalli (ms) del busy handler di SQLite (sqliteDefaultBusyCallback)
+BUSY_DELAYS_MS = (1, 2, 5, 10, 15, 20, 25, 25, 25, 50, 50, 100)
+
+
+class _Stats:
+    statements = 0
+    slow = 0
+    lock_waits = 0
+    lock_wait_s = 0.0
+    locked_errors = 0
+    threshold_s = 0.005
+
+
+def _is_busy(e):
+    return "locked" in str(e) or "busy" in str(e)
+
+
+def _timed(fn, *args):
+    waited = 0.0
+    attempt = 0
+    while True:
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args)
+            break
+        except sqlite3.OperationalError as e:
+            if not _is_busy(e) or waited >= LOCK_TIMEOUT_S:
+                if _is_busy(e):
+                    _Stats.locked_errors += 1
+                _record(time.perf_counter() - t0, waited)
+                raise
+        delay = BUSY_DELAYS_MS[min(attempt, len(BUSY_DELAYS_MS) - 1)] / 1000.0
+        delay = min(delay, LOCK_TIMEOUT_S - waited)
+        time.sleep(delay)
+        waited += time.perf_counter() - t0
+        attempt += 1
+    _record(time.perf_counter() - t0, waited)
+    return result
+
+
+def _record(exec_s, waited):
+    _Stats.statements += 1
+    if waited:
+        _Stats.lock_waits += 1
+        _Stats.lock_wait_s += waited
+    if exec_s >= _Stats.threshold_s:
+        _Stats.slow += 1
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, *args):
+        return _timed(super().execute, *args)
+
+    def executemany(self, *args):
+        return _timed(super().executemany, *args)
+
+
+class TimedConnection(db.PooledConnection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+    def commit(self):
+        return _timed(super().commit)
+
+
+def use_data_dir(data_dir):
+    """Punta db.py (torneo di default, altri tornei e registry) su data_dir."""
+    data_dir = Path(data_dir)
+    db.DB_PATH = data_dir / "tournament.db"
+    db.TOURNAMENTS_DIR = data_dir / "tournaments"
+    db.REGISTRY_PATH = db.TOURNAMENTS_DIR / "_registry.db"
+
+
+def install_instrumentation(data_dir, threshold_ms):
+    """
+    Punta db.py ai database di test e fa passare tutte le connessioni
+    (anche quelle aperte da bracket.py) per TimedConnection.
+    """
+    use_data_dir(data_dir)
+    _Stats.threshold_s = threshold_ms / 1000.0
+
+    connect = sqlite3.connect
+
+    def timed_connect(*args, **kwargs):
+        kwargs["factory"] = TimedConnection
+        kwargs["timeout"] = 0  # le attese sul lock le gestisce _timed()
+        return connect(*args, **kwargs)
+
+    sqlite3.connect = timed_connect
+
+
+# --- setup ---
+def prepare_db(data_dir, n_tournaments, n_players):
+    """Crea i tornei di test con un bracket già generato; ritorna gli id."""
+    from bracket import generate_single_elim, advance_winners
+
+    use_data_dir(data_dir)
+    tournament_ids = [db.DEFAULT_TOURNAMENT]
+    for k in range(2, n_tournaments + 1):
+        tournament_ids.append(db.create_tournament(f"Load test {k}"))
+
+    for tid in tournament_ids:
+        db.set_current_tournament(tid)
+        db.init_db()
+        db.reset_tournament(keep_players=False)
+        db.add_players([f"Giocatore {i:03d}" for i in range(1, n_players + 1)])
+        generate_single_elim([p[0] for p in db.list_players()])
+        advance_winners()
+
+    db.close_conns()
+    return tournament_ids
+
+
+# --- sessioni ---
+def _button(at, label):
+    for b in at.button:
+        if b.label == label:
+            return b
+    return None
+
+
+def new_app(tournament_id, admin, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP_DIR / "app.py"), default_timeout=timeout)
+    at.session_state["tournament_id"] = tournament_id
+    if admin:
+        at.session_state["admin_ok"] = True
+    return at
+
+
+def run_session(idx, admin, tournament_id, data_dir, start_at, duration, think_ms, timeout, threshold_ms):
+    """
+    Una sessione browser simulata. Gli spettatori fanno solo rerun (come
+    l'auto-refresh o un'interazione qualsiasi); gli admin ad ogni giro salvano
+    il risultato del primo match in attesa e, se il bracket è finito, lo
+    rigenerano per continuare a scrivere.
+    """
+    os.chdir(APP_DIR)  # app.py carica assets/ con path relativi
+    install_instrumentation(data_dir, threshold_ms)
+    rng = random.Random(idx)
+
+    at = new_app(tournament_id, admin, timeout)
+    # primo rerun fuori misura: importa pandas/graphviz e compila app.py,
+    # costo che un server già avviato non paga a ogni sessione
+    try:
+        at.run()
+    except Exception:
+        at = new_app(tournament_id, admin, timeout)
+
+    latencies = []
+    writes = 0
+    exceptions = 0
+
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = start_at + duration
+
+    while time.time() < deadline:
+        action = None
+        if admin:
+            # il selettore del torneo è sempre presente: guarda il form del risultato
+            action = _button(at, "✅ Salva risultato")
+            if action is not None:
+                at.number_input[0].set_value(11)
+                at.number_input[1].set_value(rng.randint(0, 9))
+            else:
+                action = _button(at, "🧩 Genera bracket (single-elimination)")
+
+        t0 = time.perf_counter()
+        try:
+            if action is not None:
+                action.click().run()
+            else:
+                at.run()
+        except Exception:
+            # timeout del rerun o errore dell'harness: la sua durata conta
+            # comunque, sono proprio i rerun più lenti che p95/p99 devono mostrare
+            latencies.append(time.perf_counter() - t0)
+            exceptions += 1
+            at = new_app(tournament_id, admin, timeout)
+            continue
+        latencies.append(time.perf_counter() - t0)
+
+        if at.exception:
+            exceptions += 1
+        if action is not None and any(s.value.startswith("Risultato salvato") for s in at.success):
+            writes += 1
+
+        if think_ms:
+            time.sleep(rng.uniform(0, think_ms) / 1000.0)
+
+    return {
+        "admin": admin,
+        "tournament": tournament_id,
+        "latencies": latencies,
+        "writes": writes,
+        "exceptions": exceptions,
+        "statements": _Stats.statements,
+        "slow": _Stats.slow,
+        "lock_waits": _Stats.lock_waits,
+        "lock_wait_s": _Stats.lock_wait_s,
+        "locked_errors": _Stats.locked_errors,
+    }
+
+
+# --- report ---
+def percentiles(values):
+    if not values:
+        return None, None, None
+    if len(values) == 1:
+        return values[0], values[0], values[0]
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return q[49], q[94], q[98]
+
+
+def fmt_ms(v):
+    return "-" if v is None else f"{v * 1000:8.1f} ms"
+
+
+def report(results, elapsed):
+    print(f"\nDurata effettiva: {elapsed:.1f} s\n")
+
+    print(f"{'sessioni':<12}{'n':>4}{'rerun':>8}{'p50':>13}{'p95':>13}{'p99':>13}")
+    groups = [
+        ("spettatori", [r for r in results if not r["admin"]]),
+        ("admin", [r for r in results if r["admin"]]),
+    ]
+    tournaments = sorted({r["tournament"] for r in results})
+    if len(tournaments) > 1:
+        groups += [(tid, [r for r in results if r["tournament"] == tid]) for tid in tournaments]
+    groups.append(("totale", results))
+
+    for label, group in groups:
+        lat = [x for r in group for x in r["latencies"]]
+        p50, p95, p99 = percentiles(lat)
+        print(f"{label:<12}{len(group):>4}{len(lat):>8}{fmt_ms(p50):>13}{fmt_ms(p95):>13}{fmt_ms(p99):>13}")
+
+    reruns = sum(len(r["latencies"]) for r in results)
+    writes = sum(r["writes"] for r in results)
+    exceptions = sum(r["exceptions"] for r in results)
+    print(f"\nThroughput: {reruns / elapsed:.2f} rerun/s, {writes / elapsed:.2f} risultati/s ({writes} salvati)")
+    print(f"Eccezioni/timeout nei rerun (inclusi nelle latenze): {exceptions}")
+
+    statements = sum(r["statements"] for r in results)
+    slow = sum(r["slow"] for r in results)
+    lock_waits = sum(r["lock_waits"] for r in results)
+    lock_wait_s = sum(r["lock_wait_s"] for r in results)
+    locked = sum(r["locked_errors"] for r in results)
+    print(
+        f"SQLite: {statements} statement, {lock_waits} in attesa sul lock "
+        f"({lock_wait_s:.2f} s totali), {locked} errori 'database is locked' "
+        f"dopo {LOCK_TIMEOUT_S:.0f} s"
+    )
+    print(f"Statement lenti (esecuzione oltre soglia, attesa esclusa): {slow}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load test offline delle sessioni Streamlit.")
+    ap.add_argument("--sessions", type=int, default=10, help="sessioni concorrenti totali")
+    ap.add_argument("--admins", type=int, default=1, help="quante di queste sono admin che scrivono risultati")
+    ap.add_argument("--tournaments", type=int, default=1, help="tornei serviti in parallelo (un DB ciascuno)")
+    ap.add_argument("--players", type=int, default=32, help="partecipanti nel bracket di test")
+    ap.add_argument("--duration", type=float, default=30.0, help="secondi di carico")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="pausa casuale massima tra due rerun")
+    ap.add_argument("--timeout", type=float, default=30.0, help="timeout di un singolo rerun (s)")
+    ap.add_argument("--lock-threshold-ms", type=float, default=5.0,
+                    help="soglia per contare uno statement SQLite come lento (attesa sul lock esclusa)")
+    args = ap.parse_args(argv)
+
+    if args.admins > args.sessions:
+        ap.error("--admins non può superare --sessions")
+    if args.tournaments < 1:
+        ap.error("--tournaments deve essere almeno 1")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tournament_ids = prepare_db(tmp, args.tournaments, args.players)
+
+        print(f"Avvio {args.sessions} sessioni ({args.admins} admin) per {args.duration:.0f} s...")
+        start_at = time.time() + 10.0  # import di streamlit e rerun di warm-up nei worker
+        with ProcessPoolExecutor(max_workers=args.sessions) as pool:
+            futures = [
+                pool.submit(
+                    run_session, i, i < args.admins, tournament_ids[i % len(tournament_ids)], tmp, start_at,
+                    args.duration, args.think_ms, args.timeout, args.lock_threshold_ms,
+                )
+                for i in range(args.sessions)
+            ]
+            results = [f.result() for f in futures]
+        elapsed = max(time.time() - start_at, args.duration)
+
+    report(results, elapsed)
+
+
+if __name__ == "__main__":
+    main()